@@ -342,11 +342,11 @@ def test_search():
         
         if response.status_code == 200:
             data = response.json()
-            if isinstance(data, list):
-                print(f"✅ Search successful (found {len(data)} results)")
+            if isinstance(data.get("results"), list) and "post_type" in data.get("facets", {}) and "tags" in data.get("facets", {}):
+                print(f"✅ Search successful (found {len(data['results'])} results)")
                 return True
             else:
-                print(f"❌ Search response is not a list: {data}")
+                print(f"❌ Search response missing results or facets: {data}")
         else:
             print(f"❌ Search failed: {response.text}")
     except Exception as e:
@@ -354,6 +354,90 @@ def test_search():
     
     return False
 
+def test_get_tags():
+    """Test listing tags with post counts"""
+    global test_post_id
+    print("\n🔍 Testing get tags...")
+    
+    if not test_post_id and not test_create_post():
+        print("❌ Cannot test tags without creating a post first")
+        return False
+    
+    try:
+        response = requests.get(f"{BASE_URL}/tags")
+        print(f"Status code: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            if isinstance(data, list) and any(t["tag"] == "test" and t["count"] >= 1 for t in data):
+                print(f"✅ Get tags successful (found {len(data)} tags)")
+                return True
+            else:
+                print(f"❌ Tags response missing a count for 'test': {data}")
+        else:
+            print(f"❌ Get tags failed: {response.text}")
+    except Exception as e:
+        print(f"❌ Get tags error: {str(e)}")
+    
+    return False
+
+def test_get_posts_by_tag():
+    """Test filtering the feed by tag"""
+    global test_post_id
+    print("\n🔍 Testing get posts by tag...")
+    
+    if not test_post_id and not test_create_post():
+        print("❌ Cannot test tag filter without creating a post first")
+        return False
+    
+    try:
+        response = requests.get(f"{BASE_URL}/posts?tag=test&limit=100")
+        print(f"Status code: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            if (isinstance(data, list) and any(post["id"] == test_post_id for post in data)
+                    and all("test" in post["tags"] for post in data)):
+                print(f"✅ Get posts by tag successful (found {len(data)} posts)")
+                return True
+            else:
+                print(f"❌ Tag filter missed post {test_post_id} or returned posts without the tag: {data}")
+        else:
+            print(f"❌ Get posts by tag failed: {response.text}")
+    except Exception as e:
+        print(f"❌ Get posts by tag error: {str(e)}")
+    
+    return False
+
+def test_trending_posts():
+    """Test getting trending posts"""
+    global test_post_id
+    print("\n🔍 Testing trending posts...")
+    
+    if not test_post_id and not test_create_post():
+        print("❌ Cannot test trending posts without creating a post first")
+        return False
+    
+    try:
+        # Viewing the post pushes it into the trending index
+        requests.get(f"{BASE_URL}/posts/{test_post_id}")
+        response = requests.get(f"{BASE_URL}/posts/trending?limit=100")
+        print(f"Status code: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            if isinstance(data, list) and any(post["id"] == test_post_id for post in data):
+                print(f"✅ Get trending posts successful (found {len(data)} posts)")
+                return True
+            else:
+                print(f"❌ Viewed post {test_post_id} missing from trending posts: {data}")
+        else:
+            print(f"❌ Get trending posts failed: {response.text}")
+    except Exception as e:
+        print(f"❌ Get trending posts error: {str(e)}")
+    
+    return False
+
 def run_tests():
     """Run all API tests"""
     print("🚀 Starting Evolance Research Portal API Tests")
@@ -369,7 +453,10 @@ def run_tests():
         ("Create Comment", test_create_comment),
         ("Get Comments", test_get_comments),
         ("Dashboard Stats", test_dashboard_stats),
-        ("Search", test_search)
+        ("Search", test_search),
+        ("Get Tags", test_get_tags),
+        ("Get Posts by Tag", test_get_posts_by_tag),
+        ("Trending Posts", test_trending_posts)
     ]
     
     results = {}
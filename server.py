@@ -1,8 +1,7 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
@@ -11,29 +10,36 @@ from typing import List, Optional
 import uuid
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
 import json
+import math
+import asyncio
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, pymongo helpers and password hashing, set up by the startup events in create_app()
+client = None
+db = None
+ReturnDocument = None
+UpdateOne = None
+pwd_context = None
 
-# JWT and password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-JWT_SECRET = os.environ.get('JWT_SECRET', 'default_secret')
+# JWT
+JWT_SECRET = 'default_secret'
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Trending ranking
+TRENDING_CAPACITY = 100
+TRENDING_EPOCH = datetime(2025, 1, 1)
+TRENDING_DECAY_SECONDS = 45000  # age at which a post needs 10x the engagement to keep its rank
+TRENDING_WEIGHTS = {"likes": 3, "views": 1, "comment_count": 5}
+
+# Startup
+PREPARE_RETRY_SECONDS = 30
+
 # Security
 security = HTTPBearer()
 
-# Create the main app without a prefix
-app = FastAPI(title="Evolance Research Portal")
-
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -81,6 +87,7 @@ class Post(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     likes: int = 0
     views: int = 0
+    comment_count: int = 0
     is_published: bool = True
     reading_time: int = 0  # in minutes
     summary: Optional[str] = None
@@ -112,6 +119,22 @@ class Like(BaseModel):
     comment_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class SearchFacets(BaseModel):
+    post_type: List[FacetCount] = []
+    tags: List[FacetCount] = []
+
+class SearchResults(BaseModel):
+    results: List[Post]
+    facets: SearchFacets
+
 # Utility functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -155,6 +178,116 @@ def calculate_reading_time(content: str) -> int:
     words = len(content.split())
     return max(1, words // 200)  # 200 words per minute
 
+def calculate_trending_score(post: dict) -> float:
+    # log-scaled engagement plus creation time, so newer posts outrank older
+    # ones without rescoring the whole set as the clock moves on
+    engagement = sum(weight * post.get(field, 0) for field, weight in TRENDING_WEIGHTS.items())
+    age_bonus = (post["created_at"] - TRENDING_EPOCH).total_seconds() / TRENDING_DECAY_SECONDS
+    return math.log10(max(engagement, 1)) + age_bonus
+
+class TrendingIndex:
+    """Bounded in-memory top-K of posts ordered by trending score.
+
+    Updated on every like/view/comment/post event with the fresh post document,
+    so reads never touch Mongo. Posts that fall out of the top-K re-enter on
+    their next event.
+    """
+
+    def __init__(self, capacity: int = TRENDING_CAPACITY):
+        self.capacity = capacity
+        self._entries = {}  # post_id -> (score, post document)
+        self._ranked = None  # cached ordering, invalidated on update
+
+    def update(self, post: dict):
+        if not post.get("is_published", True):
+            self.remove(post["id"])
+            return
+        score = calculate_trending_score(post)
+        if post["id"] not in self._entries and len(self._entries) >= self.capacity:
+            lowest_id = min(self._entries, key=lambda post_id: self._entries[post_id][0])
+            if score <= self._entries[lowest_id][0]:
+                return
+            del self._entries[lowest_id]
+        self._entries[post["id"]] = (score, post)
+        self._ranked = None
+
+    def remove(self, post_id: str):
+        if self._entries.pop(post_id, None) is not None:
+            self._ranked = None
+
+    def merge(self, posts: List[dict]):
+        # Entries already in the index came from live events and are at least as fresh
+        for post in posts:
+            if post["id"] not in self._entries:
+                self.update(post)
+
+    def top(self, limit: int, post_type: Optional[str] = None) -> List[dict]:
+        if self._ranked is None:
+            self._ranked = [post for _, post in sorted(self._entries.values(), key=lambda entry: entry[0], reverse=True)]
+        if post_type:
+            return [post for post in self._ranked if post["post_type"] == post_type][:limit]
+        return self._ranked[:limit]
+
+trending_index = TrendingIndex()
+
+async def create_indexes():
+    await db.posts.create_index("id", unique=True)
+    # tags is an array field, so this is a multikey index serving the tag filter on the feed
+    await db.posts.create_index([("tags", 1), ("created_at", -1)])
+    await db.posts.create_index([("post_type", 1), ("created_at", -1)])
+    await db.tag_counts.create_index("tag", unique=True)
+    await db.tag_counts.create_index([("count", -1), ("tag", 1)])
+    await db.backfills.create_index("name", unique=True)
+
+async def run_backfill_once(name: str, backfill):
+    # Backfills are resumable and safe to run on several dynos at once, so the
+    # marker only records completion; an interrupted run is picked up on the next start
+    if await db.backfills.find_one({"name": name, "completed_at": {"$exists": True}}):
+        return
+    await backfill()
+    await db.backfills.update_one({"name": name}, {"$set": {"completed_at": datetime.utcnow()}}, upsert=True)
+    logger.info("Backfill %s completed", name)
+
+async def backfill_comment_counts():
+    # Each comment is flagged before its post is incremented, so no comment is
+    # counted twice and increments from create_comment are never overwritten
+    async for comment in db.comments.find({"counted": {"$ne": True}}, {"id": 1, "post_id": 1}):
+        claimed = await db.comments.update_one(
+            {"id": comment["id"], "counted": {"$ne": True}}, {"$set": {"counted": True}}
+        )
+        if claimed.modified_count:
+            await db.posts.update_one({"id": comment["post_id"]}, {"$inc": {"comment_count": 1}})
+
+async def backfill_tag_counts():
+    # Each post is flagged before its tags are incremented, so no post is
+    # counted twice and increments from create_post are never overwritten
+    async for post in db.posts.find({"tags_counted": {"$ne": True}}, {"id": 1, "tags": 1}):
+        claimed = await db.posts.update_one(
+            {"id": post["id"], "tags_counted": {"$ne": True}}, {"$set": {"tags_counted": True}}
+        )
+        if claimed.modified_count and post.get("tags"):
+            await db.tag_counts.bulk_write([
+                UpdateOne({"tag": tag}, {"$inc": {"count": 1}}, upsert=True) for tag in set(post["tags"])
+            ], ordered=False)
+
+async def rebuild_trending_index():
+    engagement = {"$add": [
+        {"$multiply": [weight, {"$ifNull": [f"${field}", 0]}]}
+        for field, weight in TRENDING_WEIGHTS.items()
+    ]}
+    pipeline = [
+        {"$match": {"is_published": {"$ne": False}}},
+        {"$addFields": {"_trending_score": {"$add": [
+            {"$log10": {"$max": [engagement, 1]}},
+            {"$divide": [{"$subtract": ["$created_at", TRENDING_EPOCH]}, TRENDING_DECAY_SECONDS * 1000]}
+        ]}}},
+        {"$sort": {"_trending_score": -1}},
+        {"$limit": trending_index.capacity},
+    ]
+    posts = await db.posts.aggregate(pipeline).to_list(trending_index.capacity)
+    trending_index.merge(posts)
+    logger.info("Trending index loaded %d posts", len(posts))
+
 # Routes
 @api_router.post("/register", response_model=Token)
 async def register(user_data: UserCreate):
@@ -218,33 +351,49 @@ async def create_post(post_data: PostCreate, current_user: User = Depends(get_cu
         )
     
     post_dict = post_data.dict()
+    post_dict["tags"] = list(dict.fromkeys(tag.strip() for tag in post_data.tags if tag.strip()))
     post_dict["author_id"] = current_user.id
     post_dict["author_name"] = current_user.full_name or current_user.username
     post_dict["reading_time"] = calculate_reading_time(post_data.content)
     
     post = Post(**post_dict)
-    await db.posts.insert_one(post.dict())
+    
+    # Already counted by the $inc below, so backfill_tag_counts skips it
+    post_record = post.dict()
+    post_record["tags_counted"] = True
+    await db.posts.insert_one(post_record)
+    if post.tags:
+        await db.tag_counts.bulk_write([
+            UpdateOne({"tag": tag}, {"$inc": {"count": 1}}, upsert=True) for tag in post.tags
+        ], ordered=False)
+    trending_index.update(post.dict())
     return post
 
 @api_router.get("/posts", response_model=List[Post])
-async def get_posts(post_type: Optional[str] = None, limit: int = 20, skip: int = 0):
+async def get_posts(post_type: Optional[str] = None, tag: Optional[str] = None, limit: int = 20, skip: int = 0):
     query = {}
     if post_type:
         query["post_type"] = post_type
+    if tag:
+        query["tags"] = tag
     
     posts = await db.posts.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
     return [Post(**post) for post in posts]
 
+@api_router.get("/posts/trending", response_model=List[Post])
+async def get_trending_posts(post_type: Optional[str] = None, limit: int = Query(20, ge=1, le=TRENDING_CAPACITY)):
+    return [Post(**post) for post in trending_index.top(limit, post_type)]
+
 @api_router.get("/posts/{post_id}", response_model=Post)
 async def get_post(post_id: str):
-    post = await db.posts.find_one({"id": post_id})
+    # Increment view count
+    post = await db.posts.find_one_and_update(
+        {"id": post_id}, {"$inc": {"views": 1}}, return_document=ReturnDocument.AFTER
+    )
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Increment view count
-    await db.posts.update_one({"id": post_id}, {"$inc": {"views": 1}})
-    post["views"] += 1
-    
+    trending_index.update(post)
     return Post(**post)
 
 @api_router.post("/posts/{post_id}/like")
@@ -254,14 +403,19 @@ async def like_post(post_id: str, current_user: User = Depends(get_current_user)
     if existing_like:
         # Unlike
         await db.likes.delete_one({"id": existing_like["id"]})
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes": -1}})
-        return {"liked": False}
+        liked, delta = False, -1
     else:
         # Like
         like = Like(user_id=current_user.id, post_id=post_id)
         await db.likes.insert_one(like.dict())
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes": 1}})
-        return {"liked": True}
+        liked, delta = True, 1
+    
+    post = await db.posts.find_one_and_update(
+        {"id": post_id}, {"$inc": {"likes": delta}}, return_document=ReturnDocument.AFTER
+    )
+    if post:
+        trending_index.update(post)
+    return {"liked": liked}
 
 @api_router.post("/comments", response_model=Comment)
 async def create_comment(comment_data: CommentCreate, current_user: User = Depends(get_current_user)):
@@ -270,7 +424,16 @@ async def create_comment(comment_data: CommentCreate, current_user: User = Depen
     comment_dict["user_name"] = current_user.full_name or current_user.username
     
     comment = Comment(**comment_dict)
-    await db.comments.insert_one(comment.dict())
+    
+    # Already counted by the $inc below, so backfill_comment_counts skips it
+    comment_record = comment.dict()
+    comment_record["counted"] = True
+    await db.comments.insert_one(comment_record)
+    post = await db.posts.find_one_and_update(
+        {"id": comment.post_id}, {"$inc": {"comment_count": 1}}, return_document=ReturnDocument.AFTER
+    )
+    if post:
+        trending_index.update(post)
     return comment
 
 @api_router.get("/posts/{post_id}/comments", response_model=List[Comment])
@@ -296,27 +459,45 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         "views": total_views[0]["total_views"] if total_views else 0
     }
 
-@api_router.get("/search")
-async def search_posts(q: str, limit: int = 10):
-    posts = await db.posts.find({
+@api_router.get("/tags", response_model=List[TagCount])
+async def get_tags(limit: int = 50):
+    tags = await db.tag_counts.find({"count": {"$gt": 0}}).sort([("count", -1), ("tag", 1)]).limit(limit).to_list(limit)
+    return [TagCount(**tag) for tag in tags]
+
+@api_router.get("/search", response_model=SearchResults)
+async def search_posts(q: str, limit: int = Query(10, ge=1)):
+    query = {
         "$or": [
             {"title": {"$regex": q, "$options": "i"}},
             {"content": {"$regex": q, "$options": "i"}},
             {"tags": {"$in": [q]}}
         ]
-    }).limit(limit).to_list(limit)
-    return [Post(**post) for post in posts]
-
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    }
+    # One pass over the matches yields both the page of results and the facet counts
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "results": [{"$limit": limit}],
+            "post_type": [
+                {"$group": {"_id": "$post_type", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+            "tags": [
+                {"$unwind": "$tags"},
+                {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": 20},
+            ],
+        }},
+    ]
+    facets = (await db.posts.aggregate(pipeline).to_list(1))[0]
+    return SearchResults(
+        results=[Post(**post) for post in facets["results"]],
+        facets=SearchFacets(
+            post_type=[FacetCount(value=f["_id"], count=f["count"]) for f in facets["post_type"] if f["_id"]],
+            tags=[FacetCount(value=f["_id"], count=f["count"]) for f in facets["tags"]],
+        ),
+    )
 
 # Configure logging
 logging.basicConfig(
@@ -325,6 +506,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def connect_db_client():
+    global client, db, pwd_context, ReturnDocument, UpdateOne
+    # Imported here rather than at module level to keep import time low
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from passlib.context import CryptContext
+    from pymongo import ReturnDocument, UpdateOne
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+async def prepare_collections():
+    # Retried rather than raised, so Mongo being unreachable at boot fails
+    # individual requests instead of stopping the app from starting
+    while True:
+        try:
+            await create_indexes()
+            await run_backfill_once("tag_counts", backfill_tag_counts)
+            await run_backfill_once("comment_counts", backfill_comment_counts)
+            await rebuild_trending_index()
+            return
+        except Exception:
+            logger.exception("Failed to prepare collections, retrying in %d seconds", PREPARE_RETRY_SECONDS)
+            await asyncio.sleep(PREPARE_RETRY_SECONDS)
+
+def create_app() -> FastAPI:
+    global JWT_SECRET
+    load_dotenv(ROOT_DIR / '.env')
+    JWT_SECRET = os.environ.get('JWT_SECRET', 'default_secret')
+
+    app = FastAPI(title="Evolance Research Portal")
+
+    # Indexes, backfills and the trending rebuild are safe to run alongside
+    # requests, so they don't hold up the first one
+    async def start_prepare_collections():
+        app.state.prepare_task = asyncio.create_task(prepare_collections())
+
+    async def shutdown_db_client():
+        app.state.prepare_task.cancel()
+        client.close()
+
+    app.add_event_handler("startup", connect_db_client)
+    app.add_event_handler("startup", start_prepare_collections)
+    app.add_event_handler("shutdown", shutdown_db_client)
+
+    # Include the router in the main app
+    app.include_router(api_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
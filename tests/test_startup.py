@@ -0,0 +1,154 @@
+"""Startup-time benchmark for server.py.
+
+Both checks measure server.py against a floor taken in the same run, so the
+budgets hold across machines of different speeds:
+
+- import time: importing server.py after its framework dependencies
+  (fastapi, pydantic, ...) are already loaded. This is about 0.025s with the
+  deferred setup and about 0.18s with an eager Motor client and CryptContext.
+- time to first request: launching uvicorn with create_app() until GET
+  /api/posts answers from Mongo, minus the same for a bare FastAPI app. This
+  includes the deferred client setup and its first round trip to Mongo, and
+  catches startup work that blocks serving; index creation and backfills run
+  in the background. It needs a reachable MongoDB (BENCH_MONGO_URL). Locally
+  it is skipped without one; with CI set it fails instead.
+
+Budgets can be overridden with STARTUP_IMPORT_BUDGET and
+STARTUP_FIRST_REQUEST_BUDGET (seconds).
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+ROOT_DIR = Path(__file__).parent.parent
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "0.06"))
+FIRST_REQUEST_BUDGET = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET", "0.5"))
+RUNS = 5
+FIRST_REQUEST_TIMEOUT = 30
+
+# Top-level imports of server.py; their cost is the floor, not server.py's
+DEPENDENCY_IMPORTS = [
+    "fastapi", "fastapi.security", "starlette.middleware.cors", "pydantic", "email_validator", "jwt", "dotenv"
+]
+
+# Must not be loaded just by importing server.py
+DEFERRED_MODULES = ["motor", "pymongo", "passlib.context", "pandas", "numpy", "boto3"]
+
+BENCH_ENV = {
+    **os.environ,
+    "MONGO_URL": os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017"),
+    "DB_NAME": os.getenv("BENCH_DB_NAME", "evolance_startup_bench"),
+}
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+for name in %r:
+    importlib.import_module(name)
+start = time.perf_counter()
+import server
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": [m for m in %r if m in sys.modules]}))
+""" % (DEPENDENCY_IMPORTS, DEFERRED_MODULES)
+
+FLOOR_APP = """
+from fastapi import FastAPI
+
+app = FastAPI()
+
+@app.get("/api/posts")
+async def get_posts():
+    return []
+"""
+
+
+def measure_import():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=ROOT_DIR, env=BENCH_ENV, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(uvicorn_args, cwd):
+    port = free_port()
+    with tempfile.TemporaryFile() as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", *uvicorn_args, "--host=127.0.0.1", f"--port={port}"],
+            cwd=cwd, env=BENCH_ENV, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            while time.perf_counter() - start < FIRST_REQUEST_TIMEOUT and process.poll() is None:
+                try:
+                    response = requests.get(f"http://127.0.0.1:{port}/api/posts", timeout=1)
+                    if response.status_code == 200:
+                        return time.perf_counter() - start
+                except requests.ConnectionError:
+                    pass
+                time.sleep(0.02)
+            exit_code = process.poll()
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+        log.seek(0)
+        output = log.read().decode(errors="replace")
+    reason = "never answered GET /api/posts" if exit_code is None else f"exited with code {exit_code}"
+    pytest.fail(f"uvicorn {' '.join(uvicorn_args)} {reason}:\n{output}")
+
+
+def mongo_available():
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    mongo = MongoClient(BENCH_ENV["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        mongo.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        mongo.close()
+
+
+def test_import_time():
+    runs = [measure_import() for _ in range(RUNS)]
+    median = statistics.median(run["seconds"] for run in runs)
+    print(f"import server (beyond dependencies): median {median:.3f}s over {RUNS} runs (budget {IMPORT_BUDGET:.3f}s)")
+
+    assert runs[0]["modules"] == [], f"Importing server loaded deferred modules: {runs[0]['modules']}"
+    assert median <= IMPORT_BUDGET, f"Import time regressed: {median:.3f}s > {IMPORT_BUDGET:.3f}s"
+
+
+def test_time_to_first_request(tmp_path):
+    if not mongo_available():
+        message = f"MongoDB not reachable at {BENCH_ENV['MONGO_URL']}"
+        if os.getenv("CI"):
+            pytest.fail(message)
+        pytest.skip(message)
+
+    (tmp_path / "floor_app.py").write_text(FLOOR_APP)
+    floor = statistics.median(measure_first_request(["floor_app:app"], tmp_path) for _ in range(RUNS))
+    server = statistics.median(
+        measure_first_request(["server:create_app", "--factory"], ROOT_DIR) for _ in range(RUNS)
+    )
+    overhead = server - floor
+    print(f"time to first request: {server:.3f}s, bare FastAPI {floor:.3f}s, "
+          f"overhead {overhead:.3f}s (budget {FIRST_REQUEST_BUDGET:.3f}s)")
+    assert overhead <= FIRST_REQUEST_BUDGET, (
+        f"Time to first request regressed: {overhead:.3f}s over bare FastAPI > {FIRST_REQUEST_BUDGET:.3f}s"
+    )
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+from server import TRENDING_DECAY_SECONDS, TrendingIndex, calculate_trending_score
+
+NOW = datetime(2025, 6, 1)
+
+
+def make_post(post_id, likes=0, views=0, comment_count=0, age_hours=0, post_type="blog", is_published=True):
+    return {
+        "id": post_id,
+        "post_type": post_type,
+        "likes": likes,
+        "views": views,
+        "comment_count": comment_count,
+        "created_at": NOW - timedelta(hours=age_hours),
+        "is_published": is_published,
+    }
+
+
+def ranked_ids(index, limit=10, post_type=None):
+    return [post["id"] for post in index.top(limit, post_type)]
+
+
+def test_score_grows_with_engagement():
+    quiet = calculate_trending_score(make_post("a"))
+    liked = calculate_trending_score(make_post("a", likes=10))
+    commented = calculate_trending_score(make_post("a", comment_count=10))
+    assert quiet < liked < commented
+
+
+def test_score_decays_with_age():
+    fresh = calculate_trending_score(make_post("a", likes=10))
+    old = calculate_trending_score(make_post("a", likes=10, age_hours=24))
+    assert fresh > old
+
+
+def test_tenfold_engagement_offsets_decay_period():
+    older = make_post("a", views=100, age_hours=TRENDING_DECAY_SECONDS / 3600)
+    newer = make_post("b", views=10)
+    assert abs(calculate_trending_score(older) - calculate_trending_score(newer)) < 1e-9
+
+
+def test_top_orders_by_score():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("low", likes=1))
+    index.update(make_post("high", likes=100))
+    index.update(make_post("mid", likes=10))
+    assert ranked_ids(index) == ["high", "mid", "low"]
+    assert ranked_ids(index, limit=2) == ["high", "mid"]
+
+
+def test_update_rescores_existing_post():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("a", likes=10))
+    index.update(make_post("b", likes=5))
+    index.update(make_post("b", likes=50))
+    assert ranked_ids(index) == ["b", "a"]
+
+
+def test_capacity_evicts_lowest_score():
+    index = TrendingIndex(capacity=2)
+    index.update(make_post("a", likes=10))
+    index.update(make_post("b", likes=1))
+    index.update(make_post("c", likes=100))
+    assert ranked_ids(index) == ["c", "a"]
+
+
+def test_capacity_rejects_post_below_lowest_score():
+    index = TrendingIndex(capacity=2)
+    index.update(make_post("a", likes=10))
+    index.update(make_post("b", likes=5))
+    index.update(make_post("c", likes=1))
+    assert ranked_ids(index) == ["a", "b"]
+
+
+def test_top_filters_by_post_type():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("blog", likes=100))
+    index.update(make_post("paper", likes=10, post_type="research"))
+    assert ranked_ids(index, post_type="research") == ["paper"]
+
+
+def test_unpublished_post_is_removed():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("a", likes=10))
+    index.update(make_post("b", likes=5))
+    index.update(make_post("a", likes=10, is_published=False))
+    assert ranked_ids(index) == ["b"]
+
+
+def test_remove():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("a"))
+    index.remove("a")
+    index.remove("missing")
+    assert ranked_ids(index) == []
+
+
+def test_merge_keeps_live_entries():
+    index = TrendingIndex(capacity=10)
+    index.update(make_post("a", likes=50))
+    index.merge([make_post("a", likes=1), make_post("b", likes=10)])
+    assert ranked_ids(index) == ["a", "b"]
+    assert index.top(1)[0]["likes"] == 50